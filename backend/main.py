@@ -1,11 +1,26 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import pandas as pd
-import joblib
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List
+import asyncio
 import os
 
-app = FastAPI(title="Planetary Defense API")
+from .model_utils import neo_model_manager
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model once at startup rather than at import time
+    neo_model_manager.load()
+    # Dedicated pool for the CPU-bound XGBoost call so the event loop is never blocked.
+    # Created per startup so the same app can be started again after a shutdown
+    app.state.pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+    yield
+    app.state.pool.shutdown(wait=False)
+
+app = FastAPI(title="Planetary Defense API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -16,49 +31,102 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load Model
-MODEL_PATH = "models/neo_classifier.joblib"
-model = None
-if os.path.exists(MODEL_PATH):
-    try:
-        model = joblib.load(MODEL_PATH)
-    except Exception as e:
-        print(f"Error loading model: {e}")
-
 class AsteroidRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
     est_diameter_min: float
     relative_velocity: float
     miss_distance: float
     absolute_magnitude: float
 
+# Upper bound on /predict_batch items, keeping the (N, 7) input matrix and the
+# parsed request well inside the Cloud Run instance's memory
+MAX_BATCH_SIZE = 1000
+
+class BatchRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    items: List[AsteroidRequest] = Field(max_length=MAX_BATCH_SIZE)
+
+# Declared response models let FastAPI serialize the payload straight through
+# pydantic-core instead of the generic jsonable_encoder + json.dumps path
+class PredictionResponse(BaseModel):
+    is_hazardous: bool
+    probability: float
+
+async def parse_body(request: Request, model):
+    """
+    Validates the raw JSON body straight in pydantic-core, skipping FastAPI's
+    json.loads + per-field dependency resolution. Errors still surface as 422s.
+    """
+    try:
+        return model.model_validate_json(await request.body())
+    except ValidationError as e:
+        # Match FastAPI's own body errors, which locate every error under "body"
+        errors = e.errors(include_url=False)
+        for error in errors:
+            error["loc"] = ("body", *error["loc"])
+        raise RequestValidationError(errors)
+
+def json_body(model):
+    """OpenAPI description for routes that read their body through parse_body."""
+    return {
+        "requestBody": {
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+            "required": True,
+        }
+    }
+
 # Root endpoint (helps verify basic connectivity)
 @app.get("/")
-def root():
+async def root():
     return {"message": "Planetary Defense API is active"}
 
 # Health check endpoint (Fixes the 404 error)
 @app.get("/health")
-def health():
-    return {"status": "healthy", "model_loaded": model is not None}
+async def health():
+    return {"status": "healthy", "model_loaded": neo_model_manager.is_loaded}
 
-@app.post("/predict")
-def predict(data: AsteroidRequest):
-    if model is None:
+@app.post("/predict", response_model=PredictionResponse, openapi_extra=json_body(AsteroidRequest))
+async def predict(request: Request):
+    data = await parse_body(request, AsteroidRequest)
+    if not neo_model_manager.is_loaded:
         raise HTTPException(status_code=503, detail="Model not loaded on server.")
     
     try:
-        input_df = pd.DataFrame([data.dict()])
-        # Engineering logic
-        input_df['size_dist_ratio'] = input_df['est_diameter_min'] / (input_df['miss_distance'] + 1e-5)
-        input_df['kinetic_proxy'] = (input_df['relative_velocity']**2) * input_df['est_diameter_min']
-        input_df['velocity_dist_ratio'] = input_df['relative_velocity'] / (input_df['miss_distance'] + 1e-5)
-        
-        prediction = int(model.predict(input_df)[0])
-        probability = float(model.predict_proba(input_df)[0][1])
+        is_hazardous, probability = await asyncio.get_running_loop().run_in_executor(
+            app.state.pool,
+            neo_model_manager.infer,
+            data.est_diameter_min,
+            data.relative_velocity,
+            data.miss_distance,
+            data.absolute_magnitude,
+        )
         
         return {
-            "is_hazardous": bool(prediction),
-            "probability": f"{probability:.2%}"
+            "is_hazardous": is_hazardous,
+            "probability": probability
         }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict_batch", response_model=List[PredictionResponse])
+async def predict_batch(batch: BatchRequest):
+    if not neo_model_manager.is_loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded on server.")
+    
+    try:
+        rows = [
+            (item.est_diameter_min, item.relative_velocity, item.miss_distance, item.absolute_magnitude)
+            for item in batch.items
+        ]
+        results = await asyncio.get_running_loop().run_in_executor(
+            app.state.pool, neo_model_manager.infer_batch, rows
+        )
+        
+        return [
+            {"is_hazardous": is_hazardous, "probability": probability}
+            for is_hazardous, probability in results
+        ]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
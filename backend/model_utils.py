@@ -1,20 +1,92 @@
-import joblib
-import pandas as pd
+import xgboost as xgb
+import numpy as np
 import os
+import json
+import threading
 import logging
+from functools import lru_cache
 
 # Setup basic logging to help you debug during development
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Column order must match the training frame built in scripts/train.py
+FEATURES = [
+    "est_diameter_min",
+    "relative_velocity",
+    "miss_distance",
+    "absolute_magnitude",
+    "size_dist_ratio",
+    "kinetic_proxy",
+    "velocity_dist_ratio",
+]
+
+# Probability at or above which an object is classified as hazardous
+HAZARD_THRESHOLD = 0.5
+
+# Distinct inputs remembered by ModelManager.infer (preset templates repeat constantly)
+INFERENCE_CACHE_SIZE = 4096
+
+def quantize(*values):
+    """
+    Rounds raw inputs to 6 significant figures. Both infer and infer_batch score the
+    rounded values, so the cache key and the two endpoints always agree.
+    """
+    return tuple(float(f"{x:.6g}") for x in values)
+
+def calculate_features(diam, vel, dist, mag):
+    """
+    Single-object version of engineer_features in scripts/train.py.
+    Returns the full feature row in FEATURES order as float64 scalars.
+    """
+    diam, vel, dist = np.float64(diam), np.float64(vel), np.float64(dist)
+    # Same IEEE semantics as the vectorized training path: overflow and a zero
+    # padded distance give inf/nan instead of raising OverflowError/ZeroDivisionError
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        safe_dist = dist + 1e-5
+        return (
+            diam,
+            vel,
+            dist,
+            mag,
+            diam / safe_dist,      # size_dist_ratio
+            vel * vel * diam,      # kinetic_proxy
+            vel / safe_dist,       # velocity_dist_ratio
+        )
+
+def _load_booster(model_path: str):
+    """
+    Deserializes the booster from disk.
+    XGBoost's native loader skips rebuilding the pickled sklearn/imblearn object graph.
+    """
+    booster = xgb.Booster()
+    booster.load_model(model_path)
+    return booster
+
 class ModelManager:
     """
     Handles loading the trained model and performing inference.
     Separating this logic makes the FastAPI main.py cleaner and easier to test.
     """
-    def __init__(self, model_path: str = "models/neo_classifier.joblib"):
+    def __init__(self, model_path: str = "models/neo_classifier.ubj",
+                 features_path: str = "models/neo_features.json"):
         self.model_path = model_path
-        self.model = self._load_model()
+        self.features_path = features_path
+        self.booster = None
+        self._cached_infer = None
+        # One reusable input row per inference thread
+        self._local = threading.local()
+
+    @property
+    def is_loaded(self):
+        return self.booster is not None
+
+    def load(self):
+        """Loads the booster from disk. Returns True on success."""
+        self.booster = self._load_model()
+        # Start a fresh cache on every load so a new model never serves stale results
+        self._cached_infer = lru_cache(maxsize=INFERENCE_CACHE_SIZE)(self._infer)
+        return self.is_loaded
 
     def _load_model(self):
         """Loads the model from disk with error handling."""
@@ -23,35 +95,83 @@ class ModelManager:
             return None
         
         try:
-            model = joblib.load(self.model_path)
+            with open(self.features_path) as f:
+                features = json.load(f)
+            if features != FEATURES:
+                logger.error(f"Model was trained on {features}, but the server expects {FEATURES}.")
+                return None
+
+            booster = _load_booster(self.model_path)
             logger.info("Successfully loaded NEO Classifier model.")
-            return model
+            return booster
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             return None
 
+    def _input_buffer(self):
+        buf = getattr(self._local, "buf", None)
+        if buf is None:
+            buf = self._local.buf = np.empty((1, len(FEATURES)), dtype=np.float32)
+        return buf
+
+    def infer(self, diam, vel, dist, mag):
+        """
+        Engineers features from the four raw inputs and returns (is_hazardous, probability).
+        Results are cached on the inputs rounded to 6 significant figures.
+        """
+        # Rounding lets repeated payloads hit the cache despite float noise
+        return self._cached_infer(*quantize(diam, vel, dist, mag))
+
+    def _infer(self, diam, vel, dist, mag):
+        """
+        Uncached infer. The label is derived from the probability, so the trees are only walked once.
+        """
+        buf = self._input_buffer()
+        # Values beyond float32 range become inf in the cast, as they do inside XGBoost
+        with np.errstate(over='ignore'):
+            buf[0, :] = calculate_features(diam, vel, dist, mag)
+
+        # inplace_predict skips DMatrix construction and returns P(hazardous) directly
+        probability = float(self.booster.inplace_predict(buf)[0])
+        return probability >= HAZARD_THRESHOLD, probability
+
+    def infer_batch(self, rows):
+        """
+        Batched version of infer for a list of (diam, vel, dist, mag) tuples.
+        All rows go through a single inplace_predict call.
+        """
+        if not rows:
+            return []
+
+        batch = np.empty((len(rows), len(FEATURES)), dtype=np.float32)
+        # Extreme rows become inf in the float32 cast rather than failing the whole batch
+        with np.errstate(over='ignore'):
+            for i, row in enumerate(rows):
+                batch[i] = calculate_features(*quantize(*row))
+
+        probabilities = self.booster.inplace_predict(batch).tolist()
+        return [(p >= HAZARD_THRESHOLD, p) for p in probabilities]
+
     def predict_hazard(self, input_features: dict):
         """
         Takes a dictionary of features and returns a prediction and probability.
         """
-        if self.model is None:
+        if self.booster is None:
             return {"error": "Model not available"}
 
-        # Convert the dictionary into a DataFrame for the XGBoost model
-        # The column names must match the order/names used during training
-        df = pd.DataFrame([input_features])
-        
-        # Get binary prediction (0 or 1)
-        prediction = int(self.model.predict(df)[0])
-        
-        # Get probability (specifically for the 'Hazardous' class)
-        # Probabilities are returned as [prob_class_0, prob_class_1]
-        probability = self.model.predict_proba(df)[0][1]
+        # Fill the float32 row in the exact order used during training
+        buf = self._input_buffer()
+        for i, name in enumerate(FEATURES):
+            buf[0, i] = input_features[name]
+
+        # inplace_predict skips DMatrix construction and returns the probability
+        # for the 'Hazardous' class directly, so the label is derived from it
+        probability = float(self.booster.inplace_predict(buf)[0])
 
         return {
-            "is_hazardous": bool(prediction),
-            "hazard_probability": float(probability)
+            "is_hazardous": probability >= HAZARD_THRESHOLD,
+            "hazard_probability": probability
         }
 
-# Instantiate a singleton instance to be used by the FastAPI app
-neo_model_manager = ModelManager()
\ No newline at end of file
+# Singleton instance used by the FastAPI app; the model is loaded on app startup
+neo_model_manager = ModelManager()
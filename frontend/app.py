@@ -2,7 +2,9 @@ import streamlit as st
 import requests
 import pandas as pd
 import numpy as np
+import math
 import os
+from io import BytesIO
 import matplotlib.pyplot as plt
 
 # Configure Page
@@ -11,6 +13,54 @@ st.set_page_config(page_title="Planetary Defense DSS", page_icon="🛡️", layo
 # Handle Docker vs Local URLs
 BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
 
+def compute_insights(diam, vel, dist, mag):
+    """
+    All per-rerun scalar math in one pass of plain float operations.
+    Returns (k_proxy, s_dist, log_vel, log_diam, log_dist, log_mag, log_kp).
+    """
+    k_proxy = (vel**2) * diam
+    s_dist = diam / (dist + 1e-5)
+    
+    # MASTER'S LEVEL LOGIC: Log-scaling prevents massive values from dominating the UI.
+    # We apply log10 to compress the scale while preserving the relative ranking of drivers.
+    return (
+        k_proxy,
+        s_dist,
+        math.log10(vel + 1),
+        math.log10((diam * 1000) + 1),          # Scaled km to m for better log granularity
+        math.log10((2000000 / (dist + 1)) + 1), # Inverse log: closer distance = higher risk
+        math.log10((30 - mag) + 1),
+        math.log10(k_proxy + 1),
+    )
+
+@st.cache_data(max_entries=128)
+def render_influence_donut(labels, percentages):
+    """
+    Renders the donut chart to PNG bytes. Streamlit reruns on every widget change,
+    so unchanged inputs reuse the cached image instead of rebuilding the Figure.
+    """
+    fig, ax = plt.subplots(figsize=(4, 4))
+    colors = ['#ff9999','#66b3ff','#99ff99','#ffcc99', '#c2c2f0']
+    
+    ax.pie(
+        percentages, 
+        labels=labels, 
+        autopct='%1.1f%%', 
+        startangle=140, 
+        colors=colors,
+        wedgeprops=dict(width=0.45),
+        textprops={'fontsize': 8}
+    )
+    
+    # Center text for a professional look
+    ax.text(0, 0, 'Risk\nFactors', ha='center', va='center', fontweight='bold')
+    ax.set_title("Normalized Factor Contribution", fontsize=10)
+    
+    png = BytesIO()
+    fig.savefig(png, format='png', dpi=200, bbox_inches='tight')
+    plt.close(fig)
+    return png.getvalue()
+
 # --- HEADER SECTION ---
 st.title("🛡️ Planetary Defense Decision Support System (DSS)")
 st.markdown("""
@@ -53,23 +103,14 @@ mag = st.sidebar.slider("Absolute Magnitude (H)", 10.0, 30.0, template["mag"])
 col_stats, col_viz = st.columns([1, 2])
 with col_stats:
     st.subheader("🔢 Engineered Features")
-    k_proxy = (vel**2) * diam
-    s_dist = diam / (dist + 1e-5)
+    k_proxy, s_dist, *log_influence = compute_insights(diam, vel, dist, mag)
     st.write(f"**Kinetic Proxy:** `{k_proxy:,.0f}`")
     st.write(f"**Size-to-Distance Ratio:** `{s_dist:.2e}`")
 
 with col_viz:
     st.subheader("📊 Relative Feature Influence (Log-Normalized)")
     
-    # MASTER'S LEVEL LOGIC: Log-scaling prevents massive values from dominating the UI.
-    # We apply log10 to compress the scale while preserving the relative ranking of drivers.
-    influence_map = {
-        'Velocity': np.log10(vel + 1),
-        'Diameter': np.log10((diam * 1000) + 1),         # Scaled km to m for better log granularity
-        'Distance': np.log10((2000000 / (dist + 1)) + 1), # Inverse log: closer distance = higher risk
-        'Magnitude': np.log10((30 - mag) + 1),
-        'Kinetic Proxy': np.log10(k_proxy + 1)
-    }
+    influence_map = dict(zip(['Velocity', 'Diameter', 'Distance', 'Magnitude', 'Kinetic Proxy'], log_influence))
 
     labels = list(influence_map.keys())
     log_values = np.array(list(influence_map.values()))
@@ -78,25 +119,7 @@ with col_viz:
     log_values = np.maximum(log_values, 0.1) 
     normalized_percentages = (log_values / log_values.sum()) * 100
 
-    # Create Donut Chart
-    fig, ax = plt.subplots(figsize=(4, 4))
-    colors = ['#ff9999','#66b3ff','#99ff99','#ffcc99', '#c2c2f0']
-    
-    ax.pie(
-        normalized_percentages, 
-        labels=labels, 
-        autopct='%1.1f%%', 
-        startangle=140, 
-        colors=colors,
-        wedgeprops=dict(width=0.45),
-        textprops={'fontsize': 8}
-    )
-    
-    # Center text for a professional look
-    ax.text(0, 0, 'Risk\nFactors', ha='center', va='center', fontweight='bold')
-    ax.set_title("Normalized Factor Contribution", fontsize=10)
-    
-    st.pyplot(fig)
+    st.image(render_influence_donut(tuple(labels), tuple(normalized_percentages.tolist())))
     st.caption("Log-normalization is applied to visualize the relative impact of features across disparate numerical scales.")
 
 # --- PREDICTION LOGIC ---
@@ -109,11 +132,12 @@ if st.button("🚀 Run Comprehensive Hazard Assessment", use_container_width=Tru
             response = requests.post(f"{BACKEND_URL}/predict", json=payload)
             res = response.json()
         
-        prob_val = float(res["probability"].strip('%')) / 100
+        # The API returns the raw probability in [0, 1]; formatting happens here
+        prob_val = float(res["probability"])
         res_col1, res_col2 = st.columns(2)
         
         with res_col1:
-            st.metric("Hazard Probability", res["probability"])
+            st.metric("Hazard Probability", f"{prob_val:.2%}")
             st.progress(prob_val)
             
         with res_col2:
@@ -1,5 +1,5 @@
-import requests
-import time
+import asyncio
+import httpx
 import sys
 import os
 
@@ -8,33 +8,27 @@ import os
 BACKEND_URL = os.getenv("BACKEND_URL", "https://asteroid-backend-617598390128.us-central1.run.app")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "https://asteroid-frontend-617598390128.us-central1.run.app")
 
-def check_service(name, url):
-    """Verifies basic connectivity to a service endpoint."""
+async def check_service(client, name, url):
+    """Verifies basic connectivity to a service endpoint. Returns (ok, report)."""
     if "xxxxxx" in url:
-        print(f"Checking {name}... ❌ CONFIG ERROR: Update URL in script.")
-        return False
+        return False, f"Checking {name}... ❌ CONFIG ERROR: Update URL in script."
 
-    print(f"Checking {name} at {url}...", end=" ", flush=True)
+    label = f"Checking {name} at {url}..."
     try:
-        # Using a 15s timeout to account for Cloud Run 'cold starts'
-        response = requests.get(url, timeout=15)
+        response = await client.get(url)
         if response.status_code == 200:
-            print("✅ ONLINE")
-            return True
+            return True, f"{label} ✅ ONLINE"
         else:
-            print(f"⚠️ STATUS {response.status_code}")
-            return False
+            return False, f"{label} ⚠️ STATUS {response.status_code}"
     except Exception as e:
-        print(f"❌ OFFLINE ({type(e).__name__})")
-        return False
+        return False, f"{label} ❌ OFFLINE ({type(e).__name__})"
 
-def check_end_to_end():
-    """Validates the full inference pipeline and JSON response structure."""
-    print("Testing End-to-End Prediction Loop...", end=" ", flush=True)
+async def check_end_to_end(client):
+    """Validates the full inference pipeline and JSON response structure. Returns (ok, report)."""
+    label = "Testing End-to-End Prediction Loop..."
     
     if "xxxxxx" in BACKEND_URL:
-        print("❌ SKIPPED: Backend URL not set.")
-        return False
+        return False, f"{label} ❌ SKIPPED: Backend URL not set."
 
     # Sample payload for testing
     payload = {
@@ -45,7 +39,7 @@ def check_end_to_end():
     }
     
     try:
-        response = requests.post(f"{BACKEND_URL}/predict", json=payload, timeout=20)
+        response = await client.post(f"{BACKEND_URL}/predict", json=payload, timeout=20)
         
         if response.status_code == 200:
             data = response.json()
@@ -54,35 +48,41 @@ def check_end_to_end():
             is_haz = data.get('is_hazardous')
             
             if prob is not None:
-                print(f"✅ SUCCESS (Result: {is_haz}, Probability: {prob})")
-                return True
+                return True, f"{label} ✅ SUCCESS (Result: {is_haz}, Probability: {prob})"
             else:
-                print(f"❌ SCHEMA ERROR: 'probability' key missing in response: {data}")
-                return False
+                return False, f"{label} ❌ SCHEMA ERROR: 'probability' key missing in response: {data}"
         else:
-            print(f"❌ BACKEND ERROR (Status: {response.status_code})")
-            print(f"Detail: {response.text}")
-            return False
+            return False, (f"{label} ❌ BACKEND ERROR (Status: {response.status_code})\n"
+                           f"Detail: {response.text}")
     except Exception as e:
-        print(f"❌ CONNECTION ERROR: {e}")
-        return False
+        return False, f"{label} ❌ CONNECTION ERROR: {e}"
+
+async def run_checks():
+    # One shared client keeps connections alive across checks; the 15s timeout
+    # accounts for Cloud Run 'cold starts'. All checks run concurrently.
+    async with httpx.AsyncClient(timeout=15) as client:
+        return await asyncio.gather(
+            # Backend health is usually at /health; Frontend is at root
+            check_service(client, "Backend API", f"{BACKEND_URL}/health"),
+            check_service(client, "Frontend UI ", FRONTEND_URL),
+            check_end_to_end(client),
+        )
 
 if __name__ == "__main__":
     print("--- Planetary Defense System: Cloud Health Dashboard ---\n")
     
+    (b_ok, b_report), (f_ok, f_report), (e2e_ok, e2e_report) = asyncio.run(run_checks())
+    
     # 1. Check Connectivity
-    # Backend health is usually at /health; Frontend is at root
-    b_ok = check_service("Backend API", f"{BACKEND_URL}/health")
-    f_ok = check_service("Frontend UI ", FRONTEND_URL)
+    print(b_report)
+    print(f_report)
     
     print("\n" + "="*60)
     
     # 2. Check Logic Loop
-    if b_ok:
-        e2e_ok = check_end_to_end()
-    else:
-        print("Note: End-to-End test skipped - Backend is unreachable.")
-        e2e_ok = False
+    print(e2e_report)
+    if not b_ok:
+        print("Note: Backend is unreachable, so the End-to-End result is not conclusive.")
         
     print("="*60)
     